@@ -2,6 +2,7 @@ import zipfile
 import tarfile
 import os
 import sys
+import time
 
 # Token types
 VAR = 'VAR'
@@ -229,6 +230,20 @@ def substitute(expr, var, replacement):
 
     raise SyntaxError(f"Invalid expression type: {expr_type}")
 
+# @function normalize
+# @param expr tuple, limit int, deadline float
+# @pre expr is an expression tuple, limit is the maximum number of reduction steps, deadline is a time.monotonic() value or None
+# @post repeatedly beta reduces expr and returns (expr, normal) where normal is False if the limit or deadline was reached first
+def normalize(expr, limit=1000, deadline=None):
+    for _ in range(limit):
+        if deadline is not None and time.monotonic() >= deadline:
+            return expr, False
+        reduced_expr = beta_reduction(expr)
+        if reduced_expr == expr:
+            return expr, True
+        expr = reduced_expr
+    return expr, False
+
 # @function to_standard_format
 # @param expr tuple
 # @pre expr is an expression tuple
@@ -281,14 +296,7 @@ def process_expression(input_string):
         expr = parser(tokens)
         var_map = {}
         expr = alpha_conversion(expr, var_map)
-
-        limit = 1000
-        for _ in range(limit):
-            reduced_expr = beta_reduction(expr)
-            if reduced_expr == expr:
-                break
-            expr = reduced_expr
-
+        expr, _ = normalize(expr)
         output(expr)
     except Exception as e:
         print(f"Error processing expression '{input_string}': {e}")
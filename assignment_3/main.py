@@ -1,3 +1,4 @@
+import io
 import zipfile
 import tarfile
 import os
@@ -11,6 +12,7 @@ LAMBDA = 'LAMBDA'
 SEPARATOR = 'SEPARATOR'
 ARROW = 'ARROW'
 COLON = 'COLON'
+CARET = 'CARET'
 
 # @function lexer
 # @param input_string str
@@ -21,7 +23,8 @@ def lexer(input_string):
     current_token = ''
 
     for char in input_string:
-        if char.isalnum() or char in ['λ', '\\']:
+        # 'λ' is alphanumeric as well, but it starts a lambda instead of a name
+        if char.isalnum() and char != 'λ':
             current_token += char
         else:
             if current_token:
@@ -40,6 +43,8 @@ def lexer(input_string):
                 tokens.append((ARROW, char))
             elif char == ':':
                 tokens.append((COLON, char))
+            elif char == '^':
+                tokens.append((CARET, char))
 
     # Check for the last token if any
     if current_token:
@@ -71,6 +76,26 @@ def read_archive(file_path):
 
     return contents
 
+# @function read_lines
+# @param file_path str
+# @pre file_path is the path to a zip or tar.gz archive, or to a plain text file, containing one judgement per line
+# @post yields the lines one at a time, so files of any size are read with bounded memory
+def read_lines(file_path):
+    if file_path.endswith('.zip'):
+        with zipfile.ZipFile(file_path, 'r') as zip_file:
+            for file_name in zip_file.namelist():
+                with zip_file.open(file_name) as file:
+                    yield from io.TextIOWrapper(file, encoding='utf-8')
+    elif file_path.endswith('.tar.gz'):
+        with tarfile.open(file_path, 'r:gz') as tar_file:
+            for tar_info in tar_file:
+                if tar_info.isfile():
+                    file = tar_file.extractfile(tar_info)
+                    yield from io.TextIOWrapper(file, encoding='utf-8')
+    else:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield from file
+
 # @function parser
 # @param tokens list
 # @pre tokens is a list of tokens representing a lambda calculus expression
@@ -90,6 +115,8 @@ def parse_judgement(tokens):
     if tokens and tokens[0][0] == COLON:
         tokens.pop(0)  # Consume ':'
         type_expr = parse_type(tokens)
+        if tokens:
+            raise SyntaxError("Unexpected input after judgement")
         return (expr, type_expr)
     else:
         raise SyntaxError("Expected ':' in judgement")
@@ -124,8 +151,8 @@ def parse_expr(tokens):
             var_token = tokens.pop(0)
             var_name = var_token[1]
             # Check for type annotation
-            if tokens and tokens[0][0] == ARROW:
-                tokens.pop(0)  # Consume the arrow
+            if tokens and tokens[0][0] == CARET:
+                tokens.pop(0)  # Consume the caret
                 type_annotation = parse_type(tokens)
             else:
                 type_annotation = None  # No type annotation present
@@ -152,10 +179,10 @@ def parse_type(tokens):
     if tokens[0][0] == LPAREN:
         tokens.pop(0)
         type1 = parse_type(tokens)
-        if tokens[0][0] == ARROW:
+        if tokens and tokens[0][0] == ARROW:
             tokens.pop(0)
             type2 = parse_type(tokens)
-            if tokens[0][0] == RPAREN:
+            if tokens and tokens[0][0] == RPAREN:
                 tokens.pop(0)
                 return (type1, ARROW, type2)
             else:
@@ -163,6 +190,138 @@ def parse_type(tokens):
         else:
             raise SyntaxError("Expected '->' in type")
 
+# @function format_type
+# @param type_expr tuple
+# @pre type_expr is a type as returned by parse_type
+# @post returns the type in the input syntax, e.g. (A -> B)
+def format_type(type_expr):
+    if type_expr[0] == VAR:
+        return type_expr[1]
+    return f"({format_type(type_expr[0])} -> {format_type(type_expr[2])})"
+
+# @function is_arrow
+# @param type_expr tuple
+# @pre type_expr is a type as returned by parse_type
+# @post returns True if type_expr is a function type
+def is_arrow(type_expr):
+    return len(type_expr) == 3 and type_expr[1] == ARROW
+
+# @function extend
+# @param context tuple, var_name str, type_expr tuple, bits int
+# @pre context is None or a context returned by extend, bits is left out by callers
+# @post returns a new context binding var_name to type_expr, copying only the O(log n) nodes on its path
+def extend(context, var_name, type_expr, bits=None):
+    # The context is a persistent binary trie: the bits of the hash of a name pick its path
+    if bits is None:
+        bits = hash(var_name)
+    if context is None:
+        return (var_name, type_expr, None, None)
+    name, old_type, left, right = context
+    if name == var_name:
+        return (var_name, type_expr, left, right)
+    if bits & 1:
+        return (name, old_type, left, extend(right, var_name, type_expr, bits >> 1))
+    return (name, old_type, extend(left, var_name, type_expr, bits >> 1), right)
+
+# @function lookup
+# @param context tuple, var_name str
+# @pre context is None or a context returned by extend
+# @post returns the type var_name was last bound to
+def lookup(context, var_name):
+    bits = hash(var_name)
+    while context is not None:
+        name, type_expr, left, right = context
+        if name == var_name:
+            return type_expr
+        context = right if bits & 1 else left
+        bits >>= 1
+    raise TypeError(f"Unbound variable: {var_name}")
+
+# @function derivation
+# @param derive bool, rule str, subject str, mode str, type_expr tuple, premises tuple
+# @pre mode is '⇒' for synthesized and '⇐' for checked types
+# @post returns a derivation node, or None if derive is False
+def derivation(derive, rule, subject, mode, type_expr, premises):
+    if not derive:
+        return None
+    return (rule, subject, mode, type_expr, premises)
+
+# @function synthesize
+# @param expr tuple, context tuple, derive bool
+# @pre expr is an expression as returned by parse_expr, context is None or a context returned by extend
+# @post returns (type, derivation) for expr, raises TypeError if it has no type
+def synthesize(expr, context, derive=False):
+    if not expr:
+        raise TypeError("Empty parentheses")
+
+    if expr[0] == VAR:
+        type_expr = lookup(context, expr[1])
+        return type_expr, derivation(derive, 'Var', expr[1], '⇒', type_expr, ())
+
+    if expr[0] == LAMBDA:
+        _, var_name, annotation, body = expr
+        if annotation is None:
+            raise TypeError(f"Cannot infer the type of λ{var_name} without an annotation")
+        body_type, body_derivation = synthesize(body, extend(context, var_name, annotation), derive)
+        type_expr = (annotation, ARROW, body_type)
+        if not derive:
+            return type_expr, None
+        return type_expr, derivation(derive, 'Abs', f"λ{var_name}^{format_type(annotation)}", '⇒', type_expr, (body_derivation,))
+
+    # Parenthesized expressions apply the first subexpression to the others, left to right
+    type_expr, func_derivation = synthesize(expr[0], context, derive)
+    for arg in expr[1:]:
+        if not is_arrow(type_expr):
+            raise TypeError(f"Cannot apply an expression of type {format_type(type_expr)}")
+        arg_derivation = check(arg, type_expr[0], context, derive)
+        type_expr = type_expr[2]
+        func_derivation = derivation(derive, 'App', '', '⇒', type_expr, (func_derivation, arg_derivation))
+    return type_expr, func_derivation
+
+# @function check
+# @param expr tuple, expected tuple, context tuple, derive bool
+# @pre expr is an expression as returned by parse_expr, expected is a type as returned by parse_type
+# @post returns the derivation of expr having the expected type, raises TypeError if it does not
+def check(expr, expected, context, derive=False):
+    if expr and expr[0] == LAMBDA:
+        _, var_name, annotation, body = expr
+        if not is_arrow(expected):
+            raise TypeError(f"λ{var_name} cannot have type {format_type(expected)}")
+        if annotation is not None and annotation != expected[0]:
+            raise TypeError(f"λ{var_name} is annotated with {format_type(annotation)}, expected {format_type(expected[0])}")
+        body_derivation = check(body, expected[2], extend(context, var_name, expected[0]), derive)
+        if not derive:
+            return None
+        return derivation(derive, 'Abs', f"λ{var_name}^{format_type(expected[0])}", '⇐', expected, (body_derivation,))
+
+    # A single parenthesized expression is checked as itself
+    if expr and not isinstance(expr[0], str) and len(expr) == 1:
+        return check(expr[0], expected, context, derive)
+
+    actual, expr_derivation = synthesize(expr, context, derive)
+    if actual != expected:
+        raise TypeError(f"Expected type {format_type(expected)}, found {format_type(actual)}")
+    return expr_derivation
+
+# @function check_judgement
+# @param judgement tuple, derive bool
+# @pre judgement is a tuple of expression and declared type as returned by parse_judgement
+# @post returns the derivation of the judgement (None if derive is False), raises TypeError if the judgement does not hold
+def check_judgement(judgement, derive=False):
+    expr, type_expr = judgement
+    return check(expr, type_expr, None, derive)
+
+# @function format_derivation
+# @param node tuple, depth int
+# @pre node is a derivation returned by check_judgement
+# @post yields one line per rule, premises indented below their conclusion
+def format_derivation(node, depth=0):
+    rule, subject, mode, type_expr, premises = node
+    subject = f" {subject}" if subject else ''
+    yield f"{'  ' * depth}{rule}{subject} {mode} {format_type(type_expr)}"
+    for premise in premises:
+        yield from format_derivation(premise, depth + 1)
+
 # @function beta_reduction
 # @param expr tuple, var str, arg tuple
 # @pre expr is a lambda calculus expression tuple, var is a variable name, arg is an expression tuple
@@ -189,49 +348,78 @@ def to_standard_format(expr):
             return expr[1]
         elif expr[0] == LAMBDA:
             var_name = expr[1]
-            type_annotation = to_standard_format(expr[2]) if expr[2] is not None else ''
+            type_annotation = f"^{format_type(expr[2])}" if expr[2] is not None else ''
             body = to_standard_format(expr[3])
-            return f"(λ{var_name}^{type_annotation}.{body})"
+            return f"(λ{var_name}{type_annotation}.{body})"
+        elif len(expr) == 1 and expr[0] and expr[0][0] == LAMBDA:
+            # A lambda prints its own parentheses
+            return to_standard_format(expr[0])
         else:
-            # Handle nested tuple expressions
-            return ' '.join(to_standard_format(sub_expr) for sub_expr in expr)
+            # Handle nested tuple expressions, keeping their parentheses
+            return f"({' '.join(to_standard_format(sub_expr) for sub_expr in expr)})"
     elif isinstance(expr, str):
         # Directly return strings (like variables or types)
         return expr
     else:
         raise TypeError(f"Invalid expression type: {type(expr)}")
 
+# @function format_judgement
+# @param judgement tuple
+# @pre judgement is a tuple of lambda calculus expression and its type
+# @post returns the judgement in a human-readable format
+def format_judgement(judgement):
+    standard_format_expr = to_standard_format(judgement[0])
+    return f"{standard_format_expr} : {format_type(judgement[1])}"
+
 # @function output
 # @param judgement tuple
 # @pre judgement is a tuple of lambda calculus expression and its type
 # @post prints the judgement in a human-readable format 
 def output(judgement):
-    standard_format_expr = to_standard_format(judgement[0])
-    print(f"{standard_format_expr} : {to_standard_format(judgement[1])}")
+    print(format_judgement(judgement))
+
+# @function process_judgement
+# @param line str, derive bool
+# @pre line is a string representing a judgement
+# @post type checks the judgement and outputs it, followed by its derivation if derive is True, returns False if it does not hold
+def process_judgement(line, derive=False):
+    try:
+        tokens = lexer(line)
+        judgement = parser(tokens)
+        node = check_judgement(judgement, derive)
+    except Exception as e:
+        print(f"Error checking judgement '{line}': {e}")
+        return False
+    output(judgement)
+    if derive:
+        for derivation_line in format_derivation(node, 1):
+            print(derivation_line)
+    return True
 
 # @function main
-# @pre main entry point of the program
-# @post reads input (either a single expression or a file containing multiple expressions), parses, and outputs the result
+# @pre main entry point of the program, optionally called with --derivation to print typing derivations
+# @post reads input (either a single expression or a file containing multiple expressions), type checks it, and outputs the result
 def main():
-    if len(sys.argv) > 1:
-        file_name = sys.argv[1]
+    derive = '--derivation' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--derivation']
+    if args:
+        file_name = args[0]
+        valid = True
         try:
-            contents = read_archive(file_name)
+            # Judgements are checked as they are read, so the file is never held in memory
+            for line in read_lines(file_name):
+                line = line.strip()
+                if line:
+                    valid = process_judgement(line, derive) and valid
         except Exception as e:
             print(f"Error: {e}")
             print("Exiting")
             return 1
-        for line in contents.splitlines():
-                tokens = lexer(line)
-                judgement = parser(tokens)
-                output(judgement)
+        return 0 if valid else 1
     else:
         # Debug mode: process a single expression
         expression = input("Enter an expression: ")
-        tokens = lexer(expression)
-        judgement = parser(tokens)
-        output(judgement)
-    return 0
+        return 0 if process_judgement(expression, derive) else 1
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from main import load_assignment, DEFAULT_STEPS, DEFAULT_TIMEOUT
+
+# Maximum size of a single response line
+MAX_RESPONSE_SIZE = 16 * 1024 * 1024
+
+# @function build_requests
+# @param expressions list, op str, steps int, timeout float
+# @pre expressions is a list of input strings
+# @post returns one request object per expression, numbered in order
+def build_requests(expressions, op, steps=DEFAULT_STEPS, timeout=DEFAULT_TIMEOUT):
+    return [
+        {'id': i, 'op': op, 'input': expression, 'steps': steps, 'timeout': timeout}
+        for i, expression in enumerate(expressions)
+    ]
+
+# @function group_batches
+# @param requests list, batch_size int
+# @pre batch_size is a positive integer
+# @post returns the messages to send: single requests if batch_size is 1, lists of requests otherwise
+def group_batches(requests, batch_size):
+    if batch_size == 1:
+        return list(requests)
+    return [requests[i:i + batch_size] for i in range(0, len(requests), batch_size)]
+
+# @function flatten
+# @param responses list
+# @pre responses is a list of responses and lists of responses
+# @post returns the responses as a single flat list
+def flatten(responses):
+    flat = []
+    for response in responses:
+        if isinstance(response, list):
+            flat.extend(response)
+        else:
+            flat.append(response)
+    return flat
+
+# @function send_lines
+# @param path str, messages list
+# @pre a server is listening on the unix socket at path
+# @post sends all messages back to back and returns the responses in the same order
+async def send_lines(path, messages):
+    reader, writer = await asyncio.open_unix_connection(path, limit=MAX_RESPONSE_SIZE)
+    try:
+        # Pipelined: everything is written before the first response is read
+        for message in messages:
+            writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+        responses = []
+        for _ in messages:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            responses.append(json.loads(line))
+        return responses
+    finally:
+        writer.close()
+
+# @function read_http_response
+# @param reader StreamReader
+# @pre reader is positioned at the start of an HTTP response
+# @post returns the decoded JSON body of the response
+async def read_http_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Server closed the connection")
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    return json.loads(await reader.readexactly(length))
+
+# @function send_http
+# @param host str, port int, messages list
+# @pre a server is listening for HTTP on host:port
+# @post sends all messages as pipelined POST /eval requests and returns the responses in the same order
+async def send_http(host, port, messages):
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_RESPONSE_SIZE)
+    try:
+        for message in messages:
+            body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+            head = (
+                f"POST /eval HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"\r\n"
+            )
+            writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+        return [await read_http_response(reader) for _ in messages]
+    finally:
+        writer.close()
+
+# @function evaluate_remote
+# @param expressions list, op str, unix_path str, host str, port int, batch_size int, steps int, timeout float
+# @pre a server is listening on unix_path, or on host:port if unix_path is None
+# @post evaluates every expression on the server and returns one response per expression
+def evaluate_remote(expressions, op, unix_path=None, host='127.0.0.1', port=None,
+                    batch_size=1, steps=DEFAULT_STEPS, timeout=DEFAULT_TIMEOUT):
+    messages = group_batches(build_requests(expressions, op, steps, timeout), batch_size)
+    if unix_path:
+        responses = asyncio.run(send_lines(unix_path, messages))
+    else:
+        responses = asyncio.run(send_http(host, port, messages))
+    return flatten(responses)
+
+# @function read_expressions
+# @param file_path str
+# @pre file_path is an archive (zip or tar.gz), a plain text file, '-' for stdin, or None
+# @post returns the non empty lines to evaluate
+def read_expressions(file_path):
+    if file_path is None:
+        return [input("Enter an expression: ")]
+    if file_path == '-':
+        contents = sys.stdin.read()
+    elif file_path.endswith('.zip') or file_path.endswith('.tar.gz'):
+        contents = load_assignment('assignment_3').read_archive(file_path)
+    else:
+        with open(file_path, encoding='utf-8') as file:
+            contents = file.read()
+    return [line for line in contents.splitlines() if line.strip()]
+
+# @function main
+# @pre program entry point
+# @post sends the expressions to the server and prints "input -> output" per expression
+def main():
+    arg_parser = argparse.ArgumentParser(description="Client for the λ-calculus evaluation server")
+    arg_parser.add_argument('file', nargs='?', help="archive or text file with one expression per line, '-' for stdin")
+    arg_parser.add_argument('--unix', metavar='PATH', help="unix socket of the server")
+    arg_parser.add_argument('--http', metavar='PORT', type=int, help="HTTP port of the server")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="HTTP host of the server")
+    arg_parser.add_argument('--op', default='reduce', help="operation: format, reduce, judgement, check or derive")
+    arg_parser.add_argument('--batch', type=int, default=1, help="number of expressions per request")
+    arg_parser.add_argument('--steps', type=int, default=DEFAULT_STEPS, help="step budget per expression")
+    arg_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="time budget per expression in seconds")
+    args = arg_parser.parse_args()
+
+    if not args.unix and args.http is None:
+        arg_parser.error("expected --unix or --http")
+    if args.batch < 1:
+        arg_parser.error("--batch must be positive")
+
+    expressions = read_expressions(args.file)
+    try:
+        responses = evaluate_remote(expressions, args.op, args.unix, args.host, args.http,
+                                    args.batch, args.steps, args.timeout)
+    except (OSError, ConnectionError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    failed = 0
+    for expression, response in zip(expressions, responses):
+        if response['ok']:
+            print(f"{expression} -> {response['result']}")
+        else:
+            failed += 1
+            print(f"{expression} -> Error: {response['error']}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,536 @@
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import importlib.util
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import stat
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget defaults, overridable per request
+DEFAULT_STEPS = 1000
+DEFAULT_TIMEOUT = 5.0
+
+# Extra time granted to a worker before it is killed and replaced
+GRACE = 1.0
+
+# Workers are spawned rather than forked, so they do not inherit the client sockets
+WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
+# Maximum size of a single request line or body
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+STATUS_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large'
+}
+
+# @function load_assignment
+# @param name str
+# @pre name is the directory of an assignment containing a main.py
+# @post imports and returns the assignment's main.py as a module
+def load_assignment(name):
+    path = os.path.join(ROOT, name, 'main.py')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Loaded once per process, so workers never pay the import cost per request
+assignment_1 = load_assignment('assignment_1')
+assignment_2 = load_assignment('assignment_2')
+assignment_3 = load_assignment('assignment_3')
+
+# @function run_format
+# @param text str, steps int, deadline float
+# @pre text is an expression in the assignment 1 syntax
+# @post returns the expression in its standard format
+def run_format(text, steps, deadline):
+    tokens = assignment_1.lexer(text)
+    expr = assignment_1.parser(tokens)
+    return assignment_1.to_standard_format(expr)
+
+# @function run_reduce
+# @param text str, steps int, deadline float
+# @pre text is an expression in the assignment 2 syntax
+# @post returns the normal form of the expression, raises TimeoutError if the budget runs out first
+def run_reduce(text, steps, deadline):
+    tokens = assignment_2.lexer(text)
+    expr = assignment_2.parser(tokens)
+    expr = assignment_2.alpha_conversion(expr, {})
+    expr, normal = assignment_2.normalize(expr, steps, deadline)
+    if not normal:
+        if time.monotonic() >= deadline:
+            raise TimeoutError("Time budget exceeded")
+        raise TimeoutError(f"Step budget of {steps} exceeded")
+    return assignment_2.to_standard_format(expr)
+
+# @function run_judgement
+# @param text str, steps int, deadline float
+# @pre text is a judgement in the assignment 3 syntax
+# @post returns the judgement in a human-readable format
+def run_judgement(text, steps, deadline):
+    tokens = assignment_3.lexer(text)
+    judgement = assignment_3.parser(tokens)
+    return assignment_3.format_judgement(judgement)
+
+# @function run_check
+# @param text str, steps int, deadline float
+# @pre text is a judgement in the assignment 3 syntax
+# @post returns the judgement in a human-readable format, raises TypeError if it does not hold
+def run_check(text, steps, deadline):
+    tokens = assignment_3.lexer(text)
+    judgement = assignment_3.parser(tokens)
+    assignment_3.check_judgement(judgement)
+    return assignment_3.format_judgement(judgement)
+
+# @function run_derive
+# @param text str, steps int, deadline float
+# @pre text is a judgement in the assignment 3 syntax
+# @post returns the typing derivation of the judgement, one rule per line, raises TypeError if it does not hold
+def run_derive(text, steps, deadline):
+    tokens = assignment_3.lexer(text)
+    judgement = assignment_3.parser(tokens)
+    node = assignment_3.check_judgement(judgement, True)
+    return '\n'.join(assignment_3.format_derivation(node))
+
+OPERATIONS = {
+    'format': run_format,
+    'reduce': run_reduce,
+    'judgement': run_judgement,
+    'check': run_check,
+    'derive': run_derive
+}
+
+# @function request_budget
+# @param request dict, key str, default number, kind type
+# @pre request is a decoded request object
+# @post returns the positive budget stored under key, or default if it is absent
+def request_budget(request, key, default, kind):
+    value = request.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, kind) or value <= 0:
+        raise ValueError(f"Expected '{key}' to be a positive number")
+    return value
+
+# @function request_timeout
+# @param request any
+# @pre request is a decoded request, possibly malformed
+# @post returns the time budget of the request in seconds, falling back to the default
+def request_timeout(request):
+    try:
+        return request_budget(request, 'timeout', DEFAULT_TIMEOUT, (int, float))
+    except (AttributeError, ValueError):
+        return DEFAULT_TIMEOUT
+
+# @function failure
+# @param request any, message str
+# @pre request is a decoded request, possibly malformed
+# @post returns an error response carrying the id of the request
+def failure(request, message):
+    request_id = request.get('id') if isinstance(request, dict) else None
+    return {'id': request_id, 'ok': False, 'error': message}
+
+# @function evaluate
+# @param request dict
+# @pre request has an 'op', an 'input' string and optionally 'id', 'steps' and 'timeout'
+# @post runs the request in the current process and returns its response
+def evaluate(request):
+    if not isinstance(request, dict):
+        return failure(request, "Expected a JSON object")
+    try:
+        op = request.get('op')
+        text = request.get('input')
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        if not isinstance(text, str):
+            raise ValueError("Expected 'input' to be a string")
+        steps = request_budget(request, 'steps', DEFAULT_STEPS, int)
+        timeout = request_budget(request, 'timeout', DEFAULT_TIMEOUT, (int, float))
+        result = OPERATIONS[op](text, steps, time.monotonic() + timeout)
+        return {'id': request.get('id'), 'ok': True, 'result': result}
+    except RecursionError:
+        return failure(request, "Expression nested too deeply")
+    except Exception as e:
+        return failure(request, str(e))
+
+# @function worker_loop
+# @param conn Connection
+# @pre conn is the worker end of a pipe to the server
+# @post evaluates every request received on conn and sends back the response, until the pipe closes
+def worker_loop(conn):
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        conn.send(evaluate(request))
+
+# @function start_worker
+# @pre called by the server process
+# @post starts a worker process and returns it as a dict with its process and pipe
+def start_worker():
+    conn, worker_conn = WORKER_CONTEXT.Pipe()
+    process = WORKER_CONTEXT.Process(target=worker_loop, args=(worker_conn,), daemon=True)
+    process.start()
+    worker_conn.close()
+    return {'process': process, 'conn': conn}
+
+# @function stop_worker
+# @param worker dict
+# @pre worker was returned by start_worker
+# @post kills the worker process, whatever it is doing
+def stop_worker(worker):
+    worker['process'].kill()
+    worker['process'].join()
+    worker['conn'].close()
+
+# @function create_pool
+# @param size int
+# @pre called from the running event loop
+# @post starts size workers and returns the pool, a dict with a queue of idle workers, a list of all workers
+#       and a thread per worker to read its responses
+def create_pool(size):
+    pool = {'idle': asyncio.Queue(), 'workers': [],
+            'readers': concurrent.futures.ThreadPoolExecutor(max_workers=size)}
+    for _ in range(size):
+        worker = start_worker()
+        pool['workers'].append(worker)
+        pool['idle'].put_nowait(worker)
+    return pool
+
+# @function close_pool
+# @param pool dict
+# @pre pool was returned by create_pool
+# @post stops every worker of the pool
+def close_pool(pool):
+    for worker in pool['workers']:
+        stop_worker(worker)
+    pool['workers'] = []
+    pool['readers'].shutdown()
+
+# @function replace_worker
+# @param pool dict, worker dict
+# @pre worker belongs to pool and is not idle
+# @post kills worker and returns a fresh worker that took its place in the pool
+def replace_worker(pool, worker):
+    stop_worker(worker)
+    pool['workers'].remove(worker)
+    worker = start_worker()
+    pool['workers'].append(worker)
+    return worker
+
+# @function receive
+# @param conn Connection
+# @pre conn is the server end of the pipe to a worker that was sent a request
+# @post blocks until the whole response has been read and returns it, raises ConnectionError if the worker exited
+def receive(conn):
+    try:
+        return conn.recv()
+    except (EOFError, OSError):
+        raise ConnectionError("Worker exited")
+
+# @function run_on_worker
+# @param pool dict, request any, timeout float
+# @pre request is a decoded request
+# @post evaluates request on an idle worker and returns its response, killing and replacing the worker if it
+#       takes longer than timeout or dies
+async def run_on_worker(pool, request, timeout):
+    worker = await pool['idle'].get()
+    loop = asyncio.get_running_loop()
+    received = None
+    try:
+        try:
+            worker['conn'].send(request)
+        except OSError:
+            # The worker died while idle and never saw the request, so a fresh worker can run it
+            worker = replace_worker(pool, worker)
+            worker['conn'].send(request)
+        # A large response fills the pipe many times over, so it is read on a thread rather than the event loop
+        received = loop.run_in_executor(pool['readers'], receive, worker['conn'])
+        return await asyncio.wait_for(asyncio.shield(received), timeout)
+    except BaseException:
+        # The worker may still be busy with the request, so it cannot be reused
+        worker['process'].kill()
+        if received is not None:
+            # The reader sees the end of the pipe once the worker is gone, the pipe is only closed after that
+            await asyncio.gather(received, return_exceptions=True)
+        worker = replace_worker(pool, worker)
+        raise
+    finally:
+        pool['idle'].put_nowait(worker)
+
+# @function run_with_budget
+# @param pool dict, request any
+# @pre request is a decoded request, possibly malformed
+# @post evaluates request on the worker pool within its own time budget and returns its response
+async def run_with_budget(pool, request):
+    try:
+        return await run_on_worker(pool, request, request_timeout(request) + GRACE)
+    except asyncio.TimeoutError:
+        return failure(request, "Time budget exceeded")
+    except Exception as e:
+        return failure(request, f"Worker failed: {e}")
+
+# @function dispatch
+# @param pool dict, payload bytes
+# @pre payload is a JSON encoded request object or a list of them (a batch)
+# @post evaluates the payload on the worker pool and returns the response or list of responses
+async def dispatch(pool, payload):
+    try:
+        request = json.loads(payload)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return failure(None, f"Invalid JSON: {e}")
+
+    # The items of a batch are sent one at a time, so an item that overruns its budget only fails itself
+    if isinstance(request, list):
+        return [await run_with_budget(pool, item) for item in request]
+    return await run_with_budget(pool, request)
+
+# @function encode
+# @param response dict or list
+# @pre response is a response object or list of them
+# @post returns the response as compact JSON bytes
+def encode(response):
+    return json.dumps(response, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# @function respond
+# @param writer StreamWriter, pending Queue, write_message function
+# @pre pending yields (task, close) pairs in the order requests arrived, then None
+# @post writes every response in request order, so pipelined clients can match them up
+async def respond(writer, pending, write_message):
+    while True:
+        item = await pending.get()
+        if item is None:
+            return
+        task, close = item
+        try:
+            write_message(writer, await task, close)
+            await writer.drain()
+        except ConnectionError:
+            return
+
+# @function pipeline
+# @param reader StreamReader, writer StreamWriter, read_message function, write_message function
+# @pre read_message returns (coroutine, close) for every request on the connection and None at the end
+# @post keeps reading requests while earlier ones are still being evaluated, then closes the connection
+async def pipeline(reader, writer, read_message, write_message):
+    pending = asyncio.Queue()
+    responder = asyncio.create_task(respond(writer, pending, write_message))
+    try:
+        while True:
+            message = await read_message(reader)
+            if message is None:
+                break
+            job, close = message
+            pending.put_nowait((asyncio.create_task(job), close))
+            if close:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        pending.put_nowait(None)
+        await responder
+        writer.close()
+
+# @function read_line
+# @param reader StreamReader, pool dict
+# @pre reader is a connection speaking the line protocol (one JSON request or batch per line)
+# @post returns the job for the next request line, or None at the end of the stream
+async def read_line(reader, pool):
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            return (respond_with(failure(None, "Request too large")), True)
+        if not line:
+            return None
+        if line.strip():
+            return (dispatch(pool, line), False)
+
+# @function write_line
+# @param writer StreamWriter, response dict or list, close bool
+# @pre response is the response to a line protocol request
+# @post writes the response as a single line
+def write_line(writer, response, close):
+    writer.write(encode(response) + b'\n')
+
+# @function respond_with
+# @param result any
+# @pre result is a ready response
+# @post returns result, as a job for the pipeline
+async def respond_with(result):
+    return result
+
+# @function read_http
+# @param reader StreamReader, pool dict
+# @pre reader is a connection speaking HTTP/1.x
+# @post returns the job for the next HTTP request, or None at the end of the stream
+async def read_http(reader, pool):
+    try:
+        request_line = await reader.readline()
+        while request_line in (b'\r\n', b'\n'):
+            request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            return (respond_with((400, failure(None, "Malformed request line"))), True)
+        method, target, version = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+    except ValueError:
+        return (respond_with((413, failure(None, "Request too large"))), True)
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        return (respond_with((400, failure(None, "Invalid Content-Length"))), True)
+    if length < 0 or length > MAX_REQUEST_SIZE:
+        return (respond_with((413, failure(None, "Request too large"))), True)
+    body = await reader.readexactly(length)
+
+    connection = headers.get('connection', '').lower()
+    close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+    if target == '/health':
+        if method != 'GET':
+            return (respond_with((405, failure(None, "Use GET"))), close)
+        return (respond_with((200, {'ok': True})), close)
+    if target == '/eval':
+        if method != 'POST':
+            return (respond_with((405, failure(None, "Use POST"))), close)
+        return (http_eval(pool, body), close)
+    return (respond_with((404, failure(None, f"Unknown path: {target}"))), close)
+
+# @function http_eval
+# @param pool dict, body bytes
+# @pre body is the JSON body of a POST /eval request
+# @post returns the HTTP status and the response to the request
+async def http_eval(pool, body):
+    return (200, await dispatch(pool, body))
+
+# @function write_http
+# @param writer StreamWriter, response tuple, close bool
+# @pre response is a (status, payload) pair
+# @post writes the payload as an HTTP/1.1 JSON response
+def write_http(writer, response, close):
+    status, payload = response
+    body = encode(payload)
+    head = (
+        f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'close' if close else 'keep-alive'}\r\n"
+        f"\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+# @function handle_lines
+# @param reader StreamReader, writer StreamWriter, pool dict
+# @pre a client connected to the line protocol socket
+# @post serves the connection until the client closes it
+async def handle_lines(reader, writer, pool):
+    await pipeline(reader, writer, lambda r: read_line(r, pool), write_line)
+
+# @function handle_http
+# @param reader StreamReader, writer StreamWriter, pool dict
+# @pre a client connected to the HTTP port
+# @post serves the connection until the client or a response closes it
+async def handle_http(reader, writer, pool):
+    await pipeline(reader, writer, lambda r: read_http(r, pool), write_http)
+
+# @function remove_stale_socket
+# @param path str
+# @pre path is where the unix socket will be bound
+# @post removes a socket left behind by a server that is no longer running, raises FileExistsError if
+#       path is anything else or a server still listens on it
+def remove_stale_socket(path):
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"A server is already listening on {path}")
+
+# @function serve
+# @param unix_path str, http_port int, host str, workers int
+# @pre at least one of unix_path and http_port is given
+# @post runs the servers until interrupted or terminated
+async def serve(unix_path, http_port, host, workers):
+    # kill and service managers stop the server with SIGTERM, which then cleans up like an interrupt
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    pool = create_pool(workers)
+    servers = []
+    try:
+        if unix_path:
+            remove_stale_socket(unix_path)
+            servers.append(await asyncio.start_unix_server(
+                functools.partial(handle_lines, pool=pool), path=unix_path, limit=MAX_REQUEST_SIZE))
+            print(f"Listening on unix socket {unix_path}")
+        if http_port is not None:
+            servers.append(await asyncio.start_server(
+                functools.partial(handle_http, pool=pool), host=host, port=http_port, limit=MAX_REQUEST_SIZE))
+            print(f"Listening on http://{host}:{http_port}")
+        sys.stdout.flush()
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+    finally:
+        # Also runs when a later bind fails, so the unix socket is not left behind
+        for server in servers:
+            server.close()
+        if unix_path and servers and os.path.exists(unix_path):
+            os.unlink(unix_path)
+        close_pool(pool)
+        loop.remove_signal_handler(signal.SIGTERM)
+
+# @function main
+# @pre program entry point
+# @post parses the command line and runs the evaluation server
+def main():
+    arg_parser = argparse.ArgumentParser(description="λ-calculus evaluation server")
+    arg_parser.add_argument('--unix', metavar='PATH', help="serve the line protocol on a unix socket")
+    arg_parser.add_argument('--http', metavar='PORT', type=int, help="serve HTTP on a local port")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="address to bind the HTTP server to")
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    args = arg_parser.parse_args()
+
+    if not args.unix and args.http is None:
+        arg_parser.error("expected --unix and/or --http")
+
+    try:
+        asyncio.run(serve(args.unix, args.http, args.host, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from client import MAX_RESPONSE_SIZE
+from main import GRACE
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# The server runs this many workers, so requests can finish out of order
+WORKERS = 2
+
+# Takes the assignment 1 parser a few tenths of a second, long enough for later requests to overtake it
+LONGER_INPUT = ' '.join(['ab'] * 40000)
+
+# Takes the assignment 1 parser well over ten seconds, so it only finishes early if its worker is killed
+SLOW_INPUT = ' '.join(['ab'] * 300000)
+SLOW_TIMEOUT = 0.2
+
+# Longest an overrunning request may hold up the next one: its budget, the grace period and a worker restart
+RECOVERY_LIMIT = SLOW_TIMEOUT + GRACE + 3.0
+
+# @function start_server
+# @param path str
+# @pre nothing is bound at path
+# @post starts a server with WORKERS workers on the unix socket at path and returns its process once it listens
+def start_server(path):
+    process = subprocess.Popen([sys.executable, 'main.py', '--unix', path, '--workers', str(WORKERS)],
+                               cwd=DIRECTORY, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Listening'):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    return process
+
+# @function exchange
+# @param path str, lines list
+# @pre a server is listening on the unix socket at path, lines are request lines without their newline
+# @post sends every line before reading any response, returns the decoded responses in order
+#       with the seconds each one took to arrive
+async def exchange(path, lines):
+    reader, writer = await asyncio.open_unix_connection(path, limit=MAX_RESPONSE_SIZE)
+    try:
+        start = time.monotonic()
+        writer.write(b''.join(line.encode('utf-8') + b'\n' for line in lines))
+        await writer.drain()
+        responses = []
+        for _ in lines:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            responses.append((json.loads(line), time.monotonic() - start))
+        return responses
+    finally:
+        writer.close()
+
+# @function send
+# @param path str, messages list
+# @pre a server is listening on the unix socket at path
+# @post sends the messages as pipelined JSON lines and returns (response, seconds) per message
+def send(path, messages):
+    return asyncio.run(exchange(path, [json.dumps(message, ensure_ascii=False) for message in messages]))
+
+# @function check_pipelining
+# @param path str
+# @pre a server is listening on the unix socket at path
+# @post returns None if pipelined responses come back in request order with the right results, a message otherwise
+def check_pipelining(path):
+    # The first request is still running when the others have finished on the other worker
+    inputs = [LONGER_INPUT] + [' '.join(['x'] * (i + 1)) for i in range(20)]
+    messages = [{'id': i, 'op': 'format', 'input': text} for i, text in enumerate(inputs)]
+    responses = send(path, messages)
+    ids = [response['id'] for response, _ in responses]
+    if ids != list(range(len(messages))):
+        return f"responses came back as {ids}"
+    for (response, _), text in zip(responses, inputs):
+        if response != {'id': response['id'], 'ok': True, 'result': text.replace(' ', '')}:
+            return f"unexpected response {response}"
+    return None
+
+# @function check_overrun
+# @param path str
+# @pre a server is listening on the unix socket at path
+# @post returns None if requests that overrun their budget fail on their own and the replaced workers
+#       answer the next request promptly, a message otherwise
+def check_overrun(path):
+    # Every worker is taken by an overrunning request, so the last one can only be answered by a replacement
+    messages = [{'id': i, 'op': 'format', 'input': SLOW_INPUT, 'timeout': SLOW_TIMEOUT} for i in range(WORKERS)]
+    messages.append({'id': WORKERS, 'op': 'format', 'input': 'a b'})
+    responses = send(path, messages)
+    for (slow, _), message in zip(responses, messages[:WORKERS]):
+        if slow != {'id': message['id'], 'ok': False, 'error': "Time budget exceeded"}:
+            return f"overrunning request answered {slow}"
+    fast, elapsed = responses[-1]
+    if fast != {'id': WORKERS, 'ok': True, 'result': 'ab'}:
+        return f"request after the overrun answered {fast}"
+    if elapsed > RECOVERY_LIMIT:
+        return f"request after the overrun took {elapsed:.1f}s, the workers were not replaced"
+    return None
+
+# @function check_batch
+# @param path str
+# @pre a server is listening on the unix socket at path
+# @post returns None if only the item of a batch that overruns its budget fails, a message otherwise
+def check_batch(path):
+    batch = [
+        {'id': 0, 'op': 'format', 'input': 'a b'},
+        {'id': 1, 'op': 'format', 'input': SLOW_INPUT, 'timeout': SLOW_TIMEOUT},
+        {'id': 2, 'op': 'judgement', 'input': '(λx^A x):(A -> A)'}
+    ]
+    [(responses, _)] = send(path, [batch])
+    expected = [
+        {'id': 0, 'ok': True, 'result': 'ab'},
+        {'id': 1, 'ok': False, 'error': "Time budget exceeded"},
+        {'id': 2, 'ok': True, 'result': '(λx^A.x) : (A -> A)'}
+    ]
+    if responses != expected:
+        return f"batch answered {responses}"
+    return None
+
+# @function check_bad_json
+# @param path str
+# @pre a server is listening on the unix socket at path
+# @post returns None if a line that is not JSON gets an error response and the connection keeps working,
+#       a message otherwise
+def check_bad_json(path):
+    (bad, _), (good, _) = asyncio.run(exchange(path, ['{"op": "format",', '{"op": "format", "input": "a b"}']))
+    if bad.get('ok') is not False or not bad.get('error', '').startswith("Invalid JSON"):
+        return f"malformed line answered {bad}"
+    if good != {'id': None, 'ok': True, 'result': 'ab'}:
+        return f"request after the malformed line answered {good}"
+    return None
+
+# @function check_shutdown
+# @param process Popen, path str
+# @pre process is the server listening on the unix socket at path
+# @post terminates the server, returns None if it exits cleanly and removes its socket, a message otherwise
+def check_shutdown(process, path):
+    process.send_signal(signal.SIGTERM)
+    try:
+        code = process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        return "server did not stop on SIGTERM"
+    if code != 0:
+        return f"server exited with status {code}"
+    if os.path.exists(path):
+        return "server left its socket behind"
+    return None
+
+CHECKS = [
+    ('pipelining', check_pipelining),
+    ('overrun', check_overrun),
+    ('batch', check_batch),
+    ('bad json', check_bad_json)
+]
+
+# @function main
+# @pre program entry point
+# @post runs every check against a server on a temporary socket, prints the results and returns 1 if any failed
+def main():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'server.sock')
+    process = start_server(path)
+    failed = False
+    try:
+        results = []
+        for name, check in CHECKS:
+            try:
+                results.append((name, check(path)))
+            except Exception as e:
+                results.append((name, f"{type(e).__name__}: {e}"))
+        results.append(('shutdown', check_shutdown(process, path)))
+        for name, message in results:
+            print(f"{name}: {'ok' if message is None else 'FAILED, ' + message}")
+            failed = failed or message is not None
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())